@@ -1,7 +1,6 @@
 """Entry point for the consult7 package when run as a module."""
 
-import asyncio
-from .server import main
+from .server import run
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
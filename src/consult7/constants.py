@@ -5,16 +5,19 @@ MAX_FILE_SIZE = 1_000_000  # 1MB per file (reasonable for source code files)
 MAX_TOTAL_SIZE = 4_000_000  # 4MB total (~1M tokens with 3.5 chars/token)
 MAX_RESPONSE_SIZE = 100_000  # 100KB response
 FILE_SEPARATOR = "-" * 80
+FILE_SEPARATOR_BYTES = FILE_SEPARATOR.encode("ascii")  # For byte-oriented content assembly
 
-# Default ignored paths
-DEFAULT_IGNORED = [
-    "__pycache__",
-    ".env",
-    "secrets.py",
-    ".DS_Store",
-    ".git",
-    "node_modules",
-]
+# Default ignored paths (frozenset for O(1) membership tests)
+DEFAULT_IGNORED: frozenset[str] = frozenset(
+    {
+        "__pycache__",
+        ".env",
+        "secrets.py",
+        ".DS_Store",
+        ".git",
+        "node_modules",
+    }
+)
 
 # API URLs
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
@@ -28,6 +31,14 @@ MODELS_URL = "https://openrouter.ai/api/v1/models"
 FUSION_MODEL = "openrouter/fusion"
 FUSION_MAX_TOOL_CALLS = {"fast": 2, "mid": 8, "think": 16}  # max_tool_calls per panel/judge step
 
+# Prompt caching (opt-in per call via cache=true): for these model families the
+# file bundle is sent as its own content block with an explicit cache_control
+# breakpoint, so repeat queries over the same files within the cache window
+# (~5 min) reuse the cached prefix. Other providers on OpenRouter (OpenAI, Grok)
+# cache matching prefixes automatically. Anthropic bills cache writes at 1.25x
+# input, so a call whose prefix is never reused just pays the surcharge.
+PROMPT_CACHE_MODEL_PREFIXES = ("anthropic/", "google/")
+
 # API constants
 DEFAULT_TEMPERATURE = 0.7  # Default temperature for all providers
 # Total wall-clock budget for one streaming call (also the httpx per-operation
@@ -36,6 +47,12 @@ DEFAULT_TEMPERATURE = 0.7  # Default temperature for all providers
 # it. This is a safety brake we expect most calls to finish well within.
 OPENROUTER_TIMEOUT = 1800.0  # 30 minutes
 API_FETCH_TIMEOUT = 30.0  # 30 seconds for fetching model info
+MODELS_CATALOG_TTL = 3600.0  # 1 hour; the /models catalog itself changes on that order
+# Shared httpx pool. Every call goes to the one openrouter.ai host, so keep enough
+# idle connections alive for a full consultation_batch_impl fan-out to reuse.
+HTTP_MAX_CONNECTIONS = 64
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 32
+HTTP_KEEPALIVE_EXPIRY = 60.0  # Seconds an idle connection stays open (httpx default: 5)
 DEFAULT_CONTEXT_LENGTH = 128_000  # Default context when not available from API
 # Outer backstop in consultation.py. Set strictly above OPENROUTER_TIMEOUT so the
 # provider's graceful partial-return path always fires first; this only trips if
@@ -54,6 +71,4 @@ SMALL_OUTPUT_TOKENS = 4_000  # Output tokens for smaller models
 SMALL_MODEL_THRESHOLD = 100_000  # Context size threshold for small models
 
 # Test model for OpenRouter
-TEST_MODELS = {
-    "openrouter": "openai/gpt-5.6-sol",
-}
+OPENROUTER_TEST_MODEL = "openai/gpt-5.6-sol"
@@ -11,7 +11,14 @@ from .constants import (
     FUSION_MAX_TOOL_CALLS,
 )
 from .file_processor import expand_file_patterns, format_content, save_output_to_file
-from .token_utils import estimate_tokens, get_thinking_budget, calculate_max_file_size
+from .token_utils import (
+    estimate_tokens,
+    estimate_tokens_parts,
+    get_thinking_budget,
+    calculate_max_file_size,
+    THINKING_LIMITS,
+    MAX_REASONING_TOKENS,
+)
 from .providers import PROVIDERS
 
 logger = logging.getLogger("consult7")
@@ -32,12 +39,75 @@ def format_cost(cost: Optional[float]) -> Optional[str]:
     return f"${cost:.4f}"
 
 
+def format_error_message(error: Exception) -> str:
+    """Map an exception to a short user-facing message.
+
+    Shared by the consultation tool and each consultation_batch entry, so a
+    failure reads the same whichever tool it came through.
+    """
+    error_str = str(error).lower()
+    if any(x in error_str for x in ["connection", "network", "timeout", "unreachable"]):
+        return "Network error. Please check your internet connection."
+    if any(x in error_str for x in ["unauthorized", "401", "403", "invalid api"]):
+        return "Invalid API key. Please check your credentials."
+    if any(x in error_str for x in ["rate limit", "429", "quota"]):
+        return "Rate limit exceeded. Please wait and try again."
+    if "not found" in error_str and "model" in error_str:
+        return "Model not found. Please check the model name."
+    if any(x in error_str for x in ["too large", "exceeds", "context"]):
+        return "Content too large. Try using fewer files or a larger context model."
+    # Return the original error if no mapping
+    return str(error)
+
+
+# Footer labels for the effort-style reasoning markers returned by call_llm
+_REASONING_MARKER_LABELS = {
+    -1: "effort=high",  # OpenAI effort=high
+    -2: "effort=medium",  # OpenAI effort=medium
+    -3: "effort=high",  # Gemini 3 effort=high (thinkingLevel=high)
+    -4: "effort=low",  # Gemini 3 effort=low (thinkingLevel=low)
+    -6: "effort=high",  # Fable 5 effort=high (mid tier)
+    -7: "effort=xhigh",  # Fable 5 effort=xhigh (think tier; max reserved to avoid overthinking)
+}
+
+
+def format_reasoning_info(thinking_budget: int, model: str, mode: str) -> str:
+    """Describe the reasoning budget actually used, for the metadata footer.
+
+    thinking_budget is the value returned by call_llm: a negative marker for
+    effort/adaptive reasoning, a positive token budget, or 0 if reasoning was dropped.
+    """
+    if (label := _REASONING_MARKER_LABELS.get(thinking_budget)) is not None:
+        return f", reasoning: {label}"
+
+    if thinking_budget == -5:
+        # Opus 4.8 / Grok 4.20: adaptive reasoning, enabled only.
+        # Model ignores effort/max_tokens, so mid and think produce identical API calls.
+        if mode == "mid":
+            return ", reasoning: adaptive (model ignores effort; mid ≡ think)"
+        return ", reasoning: adaptive (model ignores effort/budget)"
+
+    if thinking_budget > 0:
+        # Calculate percentage of maximum possible reasoning tokens,
+        # based on the model's limit in THINKING_LIMITS
+        model_limit = THINKING_LIMITS.get(model)
+        if isinstance(model_limit, int):
+            max_reasoning = model_limit
+        else:
+            max_reasoning = MAX_REASONING_TOKENS  # Default fallback
+
+        percentage = (thinking_budget / max_reasoning) * 100
+        return f", reasoning budget: {thinking_budget:,} tokens ({percentage:.1f}% of max)"
+
+    return ", reasoning disabled (insufficient context)"
+
+
 async def get_model_context_info(model_name: str, provider: str, api_key: Optional[str]) -> dict:
-    """Get model context information from OpenRouter API."""
+    """Get model context information from OpenRouter API (the provider caches the catalog)."""
     try:
         # Get provider instance (always openrouter)
         if not (provider_instance := PROVIDERS.get(provider)):
-            logger.warning(f"Unknown provider '{provider}'")
+            logger.warning("Unknown provider '%s'", provider)
             return {"context_length": DEFAULT_CONTEXT_LENGTH, "provider": provider}
 
         # Get model info from provider API
@@ -48,12 +118,12 @@ async def get_model_context_info(model_name: str, provider: str, api_key: Option
 
         # Fallback to default if no info available
         logger.warning(
-            f"Could not determine context length for {model_name}, using default of 128k tokens"
+            "Could not determine context length for %s, using default of 128k tokens", model_name
         )
         return {"context_length": DEFAULT_CONTEXT_LENGTH, "provider": provider}
 
     except Exception as e:
-        logger.error(f"Error getting model info: {e}")
+        logger.error("Error getting model info: %s", e)
         return {"context_length": DEFAULT_CONTEXT_LENGTH, "provider": provider}
 
 
@@ -66,10 +136,11 @@ async def consultation_impl(
     api_key: Optional[str] = None,
     output_file: Optional[str] = None,
     zdr: bool = False,
+    cache: bool = False,
 ) -> str:
     """Implementation of the consultation tool logic."""
-    # Expand file patterns
-    file_paths, errors = expand_file_patterns(files)
+    # Expand file patterns (directory scans run off the event loop)
+    file_paths, errors = await asyncio.to_thread(expand_file_patterns, files)
 
     if not file_paths and errors:
         return "Error: No files found. Errors:\n" + "\n".join(errors)
@@ -86,27 +157,27 @@ async def consultation_impl(
         # Calculate dynamic file size limits based on model's context window
         max_total_size, max_file_size = calculate_max_file_size(model_context_length, mode, model)
 
-        # Format content with model-specific limits
-        content, total_size = format_content(file_paths, errors, max_total_size, max_file_size)
-
-        # Add size info that will be part of the query
-        size_info = (
-            f"\n\n---\nTotal content size: {total_size:,} bytes from {len(file_paths)} files"
+        # Format content with model-specific limits (file I/O runs off the event loop)
+        content, total_size = await asyncio.to_thread(
+            format_content, file_paths, errors, max_total_size, max_file_size
         )
 
-        # Estimate tokens for the full input
-        full_content = content + size_info + f"\n\nQuery: {query}"
+        # Add size info that will be part of the query. Appended once here (in
+        # place when possible) so the multi-MB content is not concatenated twice.
+        content += f"\n\n---\nTotal content size: {total_size:,} bytes from {len(file_paths)} files"
+
+        # Estimate tokens for the full input without building it
+        estimated_tokens = estimate_tokens_parts(content, "\n\nQuery: ", query)
     else:
         # No files: query-only mode
         content = ""
         total_size = 0
-        size_info = ""
-        full_content = query
+        estimated_tokens = estimate_tokens(query)
 
-    estimated_tokens = estimate_tokens(full_content)
-    token_info = f"\nEstimated tokens: ~{estimated_tokens:,}"
+    # Footer fragments, joined once when the footer is built
+    token_parts = [f"\nEstimated tokens: ~{estimated_tokens:,}"]
     if model_context_length:
-        token_info += f" (Model limit: {model_context_length:,} tokens)"
+        token_parts.append(f" (Model limit: {model_context_length:,} tokens)")
 
     # Call appropriate LLM based on provider
     thinking_budget = None
@@ -121,7 +192,7 @@ async def consultation_impl(
     try:
         async with asyncio.timeout(LLM_CALL_TIMEOUT):
             response, error, thinking_budget, cost = await provider_instance.call_llm(
-                content + size_info,
+                content,
                 query,
                 model,
                 api_key,
@@ -129,6 +200,8 @@ async def consultation_impl(
                 thinking_budget_value,
                 zdr,
                 mode,
+                model_info=model_info,
+                cache=cache,
             )
     except asyncio.TimeoutError:
         backstop_mins = LLM_CALL_TIMEOUT / 60
@@ -136,65 +209,26 @@ async def consultation_impl(
             f"Error: Request timed out after {LLM_CALL_TIMEOUT:.0f} seconds "
             f"(~{backstop_mins:.0f} minutes) at the outer backstop - "
             f"the model or API may be hanging.\n\n"
-            f"Collected {len(file_paths)} files ({total_size:,} bytes){token_info}"
+            f"Collected {len(file_paths)} files ({total_size:,} bytes){''.join(token_parts)}"
         )
 
     # Add reasoning budget info if applicable (even for errors)
     if thinking_budget is not None:
-        if thinking_budget == -1:
-            # OpenAI effort=high
-            token_info += ", reasoning: effort=high"
-        elif thinking_budget == -2:
-            # OpenAI effort=medium
-            token_info += ", reasoning: effort=medium"
-        elif thinking_budget == -3:
-            # Gemini 3 effort=high (thinkingLevel=high)
-            token_info += ", reasoning: effort=high"
-        elif thinking_budget == -4:
-            # Gemini 3 effort=low (thinkingLevel=low)
-            token_info += ", reasoning: effort=low"
-        elif thinking_budget == -5:
-            # Opus 4.8 / Grok 4.20: adaptive reasoning, enabled only.
-            # Model ignores effort/max_tokens, so mid and think produce identical API calls.
-            if mode == "mid":
-                token_info += ", reasoning: adaptive (model ignores effort; mid ≡ think)"
-            else:
-                token_info += ", reasoning: adaptive (model ignores effort/budget)"
-        elif thinking_budget == -6:
-            # Fable 5 effort=high (mid tier)
-            token_info += ", reasoning: effort=high"
-        elif thinking_budget == -7:
-            # Fable 5 effort=xhigh (think tier; max reserved to avoid overthinking)
-            token_info += ", reasoning: effort=xhigh"
-        elif thinking_budget > 0:
-            # Calculate percentage of maximum possible reasoning tokens
-            from .token_utils import THINKING_LIMITS, MAX_REASONING_TOKENS
-
-            # Determine max reasoning based on model's limit in THINKING_LIMITS
-            model_limit = THINKING_LIMITS.get(model)
-            if isinstance(model_limit, int):
-                max_reasoning = model_limit
-            else:
-                max_reasoning = MAX_REASONING_TOKENS  # Default fallback
-
-            percentage = (thinking_budget / max_reasoning) * 100
-            token_info += (
-                f", reasoning budget: {thinking_budget:,} tokens ({percentage:.1f}% of max)"
-            )
-        else:
-            token_info += ", reasoning disabled (insufficient context)"
+        token_parts.append(format_reasoning_info(thinking_budget, model, mode))
 
     # Fusion runs a multi-model panel + judge instead of single-model reasoning;
     # report the panel and the mode-derived research-depth budget.
     if model == FUSION_MODEL:
         tool_calls = FUSION_MAX_TOOL_CALLS.get(mode, 8)
-        token_info += (
+        token_parts.append(
             f", fusion: Quality panel (opus+gpt+gemini-pro) + judge, max_tool_calls={tool_calls}"
         )
 
     # Report the call's USD cost (from OpenRouter usage accounting) when available
     if (cost_str := format_cost(cost)) is not None:
-        token_info += f", cost: {cost_str}"
+        token_parts.append(f", cost: {cost_str}")
+
+    token_info = "".join(token_parts)
 
     if error:
         return (
@@ -221,3 +255,28 @@ async def consultation_impl(
 
     # Normal mode: return full response with metadata
     return f"{response}\n\n---\n{metadata_footer}"
+
+
+async def _batch_entry(request: dict) -> str:
+    """Run one consultation_batch entry, turning a failure into an error string."""
+    try:
+        return await consultation_impl(**request)
+    except Exception as e:
+        logger.error("Error in consultation_batch entry: %s: %s", type(e).__name__, e)
+        return f"Error: {format_error_message(e)}"
+
+
+async def consultation_batch_impl(requests: list[dict]) -> list[str]:
+    """Run several consultations concurrently.
+
+    The consultations share the provider's cached model catalog and HTTP
+    connection pool, so N calls cost roughly the slowest one rather than the sum.
+
+    Args:
+        requests: Keyword arguments for consultation_impl, one dict per consultation
+
+    Returns:
+        One result per request, in order; a failed consultation becomes an "Error: ..."
+        string (cancellation is not caught and propagates to the caller)
+    """
+    return await asyncio.gather(*(_batch_entry(request) for request in requests))
@@ -1,17 +1,145 @@
 """File discovery, formatting, and utilities for Consult7."""
 
+import errno
 import os
-import glob
-from collections import defaultdict
+import re
+import stat
+import fnmatch
+from functools import lru_cache
+from itertools import groupby
+from operator import attrgetter
 from pathlib import Path
-from typing import Tuple, List
+from typing import Callable, Tuple, List, Optional
 
-from .constants import DEFAULT_IGNORED, MAX_FILE_SIZE, MAX_TOTAL_SIZE, FILE_SEPARATOR
+from .constants import (
+    DEFAULT_IGNORED,
+    MAX_FILE_SIZE,
+    MAX_TOTAL_SIZE,
+    FILE_SEPARATOR_BYTES,
+)
+
+# Fixed pieces of each per-file block in format_content, encoded once
+_HEADER_END = b"\n" + FILE_SEPARATOR_BYTES + b"\n"
+_LIMIT_EXCEEDED_LINE = b"[ERROR: Total size limit exceeded]\n"
+
+# stat() errnos that mean "no such file" for an explicit path (as in Path.exists())
+_MISSING_ERRNOS = frozenset((errno.ENOENT, errno.ENOTDIR, errno.EBADF, errno.ELOOP))
 
 
 def should_ignore_path(path: Path) -> bool:
     """Check if a path should be ignored based on default ignore list."""
-    return any(ignored in path.parts or path.name == ignored for ignored in DEFAULT_IGNORED)
+    # path.name is the last element of path.parts, so one set test covers both
+    return not DEFAULT_IGNORED.isdisjoint(path.parts)
+
+
+@lru_cache(maxsize=128)
+def _name_matcher(file_part: str) -> Callable[[str], bool]:
+    """Build a filename matcher once per unique wildcard pattern.
+
+    The common "*.ext" form is matched with str.endswith instead of a regex.
+    Case-insensitive on Windows, matching fnmatch's normcase behaviour.
+    """
+    suffix = file_part[1:]
+    if file_part.startswith("*") and not any(c in suffix for c in "*?["):
+        if os.name == "nt":
+            suffix = suffix.lower()
+            return lambda name: name.lower().endswith(suffix)
+        return lambda name: name.endswith(suffix)
+
+    flags = re.IGNORECASE if os.name == "nt" else 0
+    name_re = re.compile(fnmatch.translate(file_part), flags)
+    return lambda name: name_re.match(name) is not None
+
+
+def _scan_pattern(dir_part: str, file_part: str) -> List[Path]:
+    """List files in dir_part whose names match file_part (non-recursive glob).
+
+    Uses os.scandir so the file-type check comes from the DirEntry instead of a
+    separate stat() per glob result.
+    """
+    # Every entry shares dir_part, so an ignored directory is rejected once
+    # here and each entry only needs its own name checked
+    if should_ignore_path(Path(dir_part)):
+        return []
+
+    name_matches = _name_matcher(file_part)
+    matches = []
+    try:
+        with os.scandir(dir_part) as entries:
+            for entry in entries:
+                name = entry.name
+                # Like glob, "*" does not match hidden files unless the pattern starts with "."
+                if name.startswith(".") and not file_part.startswith("."):
+                    continue
+                if name in DEFAULT_IGNORED:
+                    continue
+                if name_matches(name) and entry.is_file():
+                    matches.append(Path(entry.path))
+    except OSError:
+        # Missing or unreadable directory: no matches, same as glob
+        pass
+    return matches
+
+
+def _expand_pattern(pattern: str) -> Tuple[List[Path], Optional[str]]:
+    """Expand a single file path/pattern.
+
+    Returns:
+        Tuple of (matching_files, error); error is None if the pattern was valid
+    """
+    try:
+        # Validate absolute path
+        if not os.path.isabs(pattern):
+            return [], (
+                f"Path must be absolute: {pattern}\n"
+                f"  Hint: Use absolute paths starting with / (e.g., /Users/name/project/file.py)"
+            )
+
+        # Specific file path (the common case for long explicit lists)
+        if "*" not in pattern:
+            # One stat() answers both "exists?" and "is it a directory?"
+            try:
+                st = os.stat(pattern)
+            except OSError as e:
+                # Same errors Path.exists() treats as "missing", symlink loops included
+                if e.errno not in _MISSING_ERRNOS:
+                    raise
+                return [], (
+                    f"File not found: {pattern}\n"
+                    f"  Check: Path is absolute? File exists? Correct spelling?"
+                )
+            if stat.S_ISDIR(st.st_mode):
+                return [], (
+                    f"Directory provided, must specify files: {pattern}\n"
+                    f"  Hint: Use wildcards to select files (e.g., {pattern}/*.py)"
+                )
+            path_obj = Path(pattern)
+            if should_ignore_path(path_obj):
+                return [], None
+            return [path_obj], None
+
+        # Wildcard pattern: ensure wildcard is only in filename portion
+        dir_part = os.path.dirname(pattern)
+        file_part = os.path.basename(pattern)
+
+        if "*" in dir_part:
+            return [], (
+                f"Wildcards only allowed in filename, not path: {pattern}\n"
+                f"  Example: /path/to/dir/*.py (not /path/*/dir/*.py)"
+            )
+
+        # Ensure extension is specified
+        if "." not in file_part.split("*")[-1]:
+            return [], (
+                f"Extension must be specified with wildcards: {pattern}\n"
+                f"  Example: *.py (not just *)"
+            )
+
+        # Expand the filename pattern with a single directory scan
+        return _scan_pattern(dir_part, file_part), None
+
+    except Exception as e:
+        return [], f"Error processing pattern '{pattern}': {e}"
 
 
 def expand_file_patterns(file_patterns: List[str]) -> Tuple[List[Path], List[str]]:
@@ -25,65 +153,32 @@ def expand_file_patterns(file_patterns: List[str]) -> Tuple[List[Path], List[str
     """
     errors = []
     matching_files = set()  # Use set to avoid duplicates
-
     for pattern in file_patterns:
-        try:
-            # Validate absolute path
-            if not os.path.isabs(pattern):
-                errors.append(
-                    f"Path must be absolute: {pattern}\n"
-                    f"  Hint: Use absolute paths starting with / (e.g., /Users/name/project/file.py)"
-                )
-                continue
-
-            # Check for wildcards
-            if "*" in pattern:
-                # Ensure wildcard is only in filename portion
-                dir_part = os.path.dirname(pattern)
-                file_part = os.path.basename(pattern)
-
-                if "*" in dir_part:
-                    errors.append(
-                        f"Wildcards only allowed in filename, not path: {pattern}\n"
-                        f"  Example: /path/to/dir/*.py (not /path/*/dir/*.py)"
-                    )
-                    continue
+        matches, error = _expand_pattern(pattern)
+        matching_files.update(matches)
+        if error:
+            errors.append(error)
 
-                # Ensure extension is specified
-                if "." not in file_part.split("*")[-1]:
-                    errors.append(
-                        f"Extension must be specified with wildcards: {pattern}\n"
-                        f"  Example: *.py (not just *)"
-                    )
-                    continue
+    return sorted(matching_files), errors
 
-                # Use glob to expand
-                expanded = glob.glob(pattern)
-                for file_path in expanded:
-                    path_obj = Path(file_path)
-                    if path_obj.is_file() and not should_ignore_path(path_obj):
-                        matching_files.add(path_obj)
-            else:
-                # Specific file path
-                path_obj = Path(pattern)
-                if path_obj.exists():
-                    if path_obj.is_dir():
-                        errors.append(
-                            f"Directory provided, must specify files: {pattern}\n"
-                            f"  Hint: Use wildcards to select files (e.g., {pattern}/*.py)"
-                        )
-                    elif not should_ignore_path(path_obj):
-                        matching_files.add(path_obj)
-                else:
-                    errors.append(
-                        f"File not found: {pattern}\n"
-                        f"  Check: Path is absolute? File exists? Correct spelling?"
-                    )
 
-        except Exception as e:
-            errors.append(f"Error processing pattern '{pattern}': {e}")
+def _read_file(file: Path, limit: int) -> bytes:
+    """Read a file to EOF, stopping after at most limit bytes.
 
-    return sorted(list(matching_files)), errors
+    Reads until os.read returns b"" rather than trusting st_size, which is 0 for
+    procfs/sysfs (and some FUSE) files and stale for a file that is still growing.
+    Returns the raw bytes; newline translation is left to the caller.
+    """
+    chunks = []
+    remaining = limit
+    fd = os.open(file, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        while remaining > 0 and (chunk := os.read(fd, remaining)):
+            chunks.append(chunk)
+            remaining -= len(chunk)
+    finally:
+        os.close(fd)
+    return b"".join(chunks)
 
 
 def format_content(
@@ -94,6 +189,10 @@ def format_content(
 ) -> Tuple[str, int]:
     """Format files into text content.
 
+    Output is assembled as UTF-8 in a single bytearray: file bodies are appended
+    as raw bytes and the whole buffer is decoded once at the end, instead of
+    decoding every file to str and joining a list of parts.
+
     Args:
         files: List of file paths to format
         errors: List to append errors to
@@ -103,78 +202,93 @@ def format_content(
     Returns:
         Tuple of (content, total_size)
     """
-    content_parts = []
+    buf = bytearray()
     total_size = 0
 
+    def write_line(line: str) -> None:
+        buf.extend(line.encode("utf-8", errors="surrogateescape"))
+        buf.extend(b"\n")
+
+    def write_separator() -> None:
+        buf.extend(FILE_SEPARATOR_BYTES)
+        buf.extend(b"\n")
+
     sorted_files = sorted(files)
 
     # Add capacity information
-    content_parts.append(
-        f"File Size Budget: {max_total_size:,} bytes (~{max_total_size // 4:,} tokens)"
-    )
-    content_parts.append(f"Files Found: {len(files)}")
-    content_parts.append("")
+    write_line(f"File Size Budget: {max_total_size:,} bytes (~{max_total_size // 4:,} tokens)")
+    write_line(f"Files Found: {len(files)}")
+    write_line("")
 
     # Add file list (no tree needed since files can be from anywhere)
-    content_parts.append("Files to Process:")
-    content_parts.append(FILE_SEPARATOR)
-
-    # Group files by directory for cleaner display
-    dirs: dict[Path, list[str]] = defaultdict(list)
-    for file in sorted_files:
-        dirs[file.parent].append(file.name)
+    write_line("Files to Process:")
+    write_separator()
 
-    # Display grouped files
-    for dir_path in sorted(dirs):
-        content_parts.append(f"{dir_path}/")
-        for filename in sorted(dirs[dir_path]):
-            content_parts.append(f"  - {filename}")
+    # Group files by directory for cleaner display: one sort by (parent, name)
+    # makes each directory's files adjacent, so groupby emits them in one pass.
+    # (Plain path order is not parent-major: /a/b.py < /a/c/d.py < /a/e.py.)
+    by_directory = sorted(sorted_files, key=lambda f: (f.parent, f.name))
+    for dir_path, dir_files in groupby(by_directory, key=attrgetter("parent")):
+        write_line(f"{dir_path}/")
+        for file in dir_files:
+            write_line(f"  - {file.name}")
 
-    content_parts.append("")
+    write_line("")
 
     # Add file contents
-    content_parts.append("File Contents:")
-    content_parts.append(FILE_SEPARATOR)
+    write_line("File Contents:")
+    write_separator()
 
     for file in sorted_files:
-        content_parts.append(f"\nFile: {file}")
-        content_parts.append(FILE_SEPARATOR)
+        buf.extend(b"\nFile: ")
+        buf.extend(os.fsencode(file))
+        buf.extend(_HEADER_END)
 
         try:
-            # Check file size
-            file_size = file.stat().st_size
+            # Check file size; stat() lets oversized files be rejected unread
+            file_size = os.stat(file).st_size
+            data = None
+            if file_size <= max_file_size and total_size + file_size <= max_total_size:
+                # The read can differ from st_size, so the limits below apply to
+                # the bytes actually read (capped one past the per-file limit, so an
+                # oversized file reports max_file_size + 1 here)
+                data = _read_file(file, max_file_size + 1)
+                file_size = len(data)
+
             if file_size > max_file_size:
-                content_parts.append(
-                    f"[ERROR: File too large ({file_size} bytes > {max_file_size} bytes)]"
-                )
+                write_line(f"[ERROR: File too large ({file_size} bytes > {max_file_size} bytes)]")
                 errors.append(f"File too large: {file} ({file_size} bytes)")
             elif total_size + file_size > max_total_size:
-                content_parts.append("[ERROR: Total size limit exceeded]")
+                buf.extend(_LIMIT_EXCEEDED_LINE)
                 errors.append(f"Total size limit exceeded at file: {file}")
                 break
             else:
-                # Read file content
-                content = file.read_text(encoding="utf-8", errors="replace")
-                content_parts.append(content)
+                # Universal-newline translation (as read_text() does); safe on raw UTF-8
+                if b"\r" in data:
+                    data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+                buf.extend(data)
+                buf.extend(b"\n")
                 total_size += file_size
 
         except PermissionError:
-            content_parts.append("[ERROR: Permission denied]")
+            write_line("[ERROR: Permission denied]")
             errors.append(f"Permission denied reading file: {file}")
         except Exception as e:
-            content_parts.append(f"[ERROR: {e}]")
+            write_line(f"[ERROR: {e}]")
             errors.append(f"Error reading file {file}: {e}")
 
-        content_parts.append("")
+        buf.extend(b"\n")
 
     # Add errors summary if any
     if errors:
-        content_parts.append(FILE_SEPARATOR)
-        content_parts.append("Errors encountered:")
+        write_separator()
+        write_line("Errors encountered:")
         for error in errors:
-            content_parts.append(f"- {error}")
+            write_line(f"- {error}")
 
-    return "\n".join(content_parts), total_size
+    # Every line was newline-terminated; drop the final one (matches "\n".join)
+    del buf[-1:]
+    return buf.decode("utf-8", errors="replace"), total_size
 
 
 def save_output_to_file(content: str, output_path: str) -> Tuple[str, str]:
@@ -208,8 +322,9 @@ def save_output_to_file(content: str, output_path: str) -> Tuple[str, str]:
             new_path = parent / f"{stem}_updated{suffix}"
 
             # Keep trying with additional "_updated" suffixes if needed
+            # (lexists: a dangling symlink also counts as taken)
             counter = 1
-            while new_path.exists() and counter < 100:
+            while os.path.lexists(new_path) and counter < 100:
                 new_path = parent / f"{stem}_updated_{counter}{suffix}"
                 counter += 1
 
@@ -5,6 +5,8 @@ from typing import Optional, Tuple
 
 from ..constants import MAX_RESPONSE_SIZE
 
+_TRUNCATED_SUFFIX = "\n[TRUNCATED - Response exceeded size limit]"
+
 
 def process_llm_response(response_content: Optional[str]) -> str:
     """Normalize and truncate LLM response if needed.
@@ -15,15 +17,28 @@ def process_llm_response(response_content: Optional[str]) -> str:
     Returns:
         Processed response content
     """
-    response = response_content or ""
-    if len(response) > MAX_RESPONSE_SIZE:
-        return response[:MAX_RESPONSE_SIZE] + "\n[TRUNCATED - Response exceeded size limit]"
-    return response
+    if response_content is None:
+        return ""
+    if len(response_content) <= MAX_RESPONSE_SIZE:
+        return response_content
+    return response_content[:MAX_RESPONSE_SIZE] + _TRUNCATED_SUFFIX
 
 
 class BaseProvider(ABC):
     """Abstract base class for LLM providers."""
 
+    async def prewarm(self) -> None:
+        """Open a connection to the provider ahead of the first request.
+
+        Optional; the default does nothing. Implementations must not raise.
+        """
+
+    async def aclose(self) -> None:
+        """Release pooled connections on server shutdown. The default does nothing."""
+
+    def set_max_concurrency(self, limit: Optional[int]) -> None:
+        """Cap concurrent LLM calls at limit (None: no cap). The default does nothing."""
+
     @abstractmethod
     async def get_model_info(self, model_name: str, api_key: Optional[str]) -> Optional[dict]:
         """Get model context information.
@@ -49,6 +64,8 @@ class BaseProvider(ABC):
         thinking_budget: Optional[int] = None,
         zdr: bool = False,
         mode: str = "fast",
+        model_info: Optional[dict] = None,
+        cache: bool = False,
     ) -> Tuple[str, Optional[str], Optional[int], Optional[float]]:
         """Call the LLM and return the response.
 
@@ -62,6 +79,10 @@ class BaseProvider(ABC):
             zdr: Whether to enforce Zero Data Retention routing
             mode: Performance mode ("fast"/"mid"/"think"); used by models like
                 Fusion that map mode to a deliberation knob rather than reasoning tokens
+            model_info: Model info the caller already looked up (as returned by
+                get_model_info); fetched from the provider when None
+            cache: Whether to mark the file bundle for prompt caching (opt-in:
+                some providers bill cache writes above the normal input price)
 
         Returns:
             Tuple of (response, error_message, actual_thinking_budget_used, cost_usd).
@@ -1,9 +1,13 @@
 """OpenRouter provider implementation for Consult7."""
 
 import asyncio
+import contextlib
+import hashlib
+import importlib.util
 import json
 import logging
-from typing import Optional, Tuple
+import time
+from typing import AsyncIterator, Optional, Tuple
 import httpx
 
 from .base import BaseProvider, process_llm_response
@@ -17,60 +21,216 @@ from ..constants import (
     DEFAULT_TEMPERATURE,
     OPENROUTER_TIMEOUT,
     API_FETCH_TIMEOUT,
+    MODELS_CATALOG_TTL,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
     FUSION_MODEL,
     FUSION_MAX_TOOL_CALLS,
+    PROMPT_CACHE_MODEL_PREFIXES,
 )
 from ..token_utils import (
     TOKEN_SAFETY_FACTOR,
-    estimate_tokens,
+    estimate_tokens_parts,
     calculate_reasoning_max_tokens,
 )
 
 logger = logging.getLogger("consult7")
 
+# Use orjson for the per-chunk SSE parsing when it is installed (optional; its
+# JSONDecodeError subclasses json.JSONDecodeError, so error handling is shared)
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+# HTTP/2 lets concurrent streams share one TLS connection; httpx needs the optional
+# h2 package for it (pip install "consult7[http2]"), so enable it only if present
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Fixed prompt text, shared by every call
+SYSTEM_PROMPT = (
+    "You are a helpful assistant analyzing code and files. Be specific and precise. "
+    "Match the length of your answer to the task — thorough when the question needs "
+    "depth or breadth, short when it doesn't. Lead with the key finding; don't pad."
+)
+FILES_PREFIX = "Here are the files to analyze:\n\n"
+
+# OpenRouter app attribution, sent as client-wide default headers
+APP_HEADERS = {
+    "HTTP-Referer": "https://github.com/consult7",
+    "X-Title": "Consult7 MCP Server",
+}
+
+
+def _index_models(response: httpx.Response) -> dict[str, dict]:
+    """Parse a /models response into a dict keyed by model id."""
+    catalog = json_loads(response.content)
+    return {model["id"]: model for model in catalog.get("data", []) if "id" in model}
+
+
+async def _iter_sse_data(response: httpx.Response) -> AsyncIterator[bytes]:
+    """Yield the payload of each SSE "data: " line as raw bytes.
+
+    Lines are split on the raw byte stream, skipping httpx's per-chunk text
+    decoding and line buffering; the JSON parser takes bytes directly.
+    Comment lines (": OPENROUTER PROCESSING") and blank separators are dropped.
+    """
+    pending = b""
+    async for block in response.aiter_bytes():
+        lines = (pending + block).split(b"\n")
+        pending = lines.pop()  # Trailing partial line, completed by the next block
+        for line in lines:
+            if line.startswith(b"data: "):
+                yield line[6:].rstrip(b"\r")
+    if pending.startswith(b"data: "):
+        yield pending[6:].rstrip(b"\r")
+
 
 class OpenRouterProvider(BaseProvider):
     """OpenRouter provider implementation."""
 
+    def __init__(self) -> None:
+        self._client: Optional[httpx.AsyncClient] = None
+        # Event loop the client and the asyncio primitives below were created on
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Optional cap on concurrent streams (--max-concurrency), so a large batch
+        # can queue locally instead of tripping OpenRouter rate limits (429s).
+        # None (the default) leaves calls unbounded.
+        self._max_concurrency: Optional[int] = None
+        self._call_slots: Optional[asyncio.Semaphore] = None
+        # /models catalog per API key (sha256 digest, never the key itself):
+        # digest -> (fetched_at, {model_id: entry}). The lock coalesces refreshes.
+        self._catalog: dict[str, tuple[float, dict[str, dict]]] = {}
+        self._catalog_lock = asyncio.Lock()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use.
+
+        One client (and its connection pool) is reused for every model-info fetch
+        and LLM call, so keep-alive connections to openrouter.ai skip the TCP/TLS
+        handshake on all but the first request.
+
+        The client's connections and the provider's locks belong to the event loop
+        they were created on. When called from a different loop (e.g. a script
+        that runs consultation_impl under several asyncio.run() calls), they are
+        rebuilt instead of reusing connections from a closed loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # The old client cannot be closed from here (its loop is gone); drop it
+            self._client = None
+            self._call_slots = self._new_call_slots()
+            self._catalog_lock = asyncio.Lock()
+            self._loop = loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=APP_HEADERS,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._client
+
+    def _new_call_slots(self) -> Optional[asyncio.Semaphore]:
+        """Build the concurrency semaphore, or None when calls are unbounded."""
+        return asyncio.Semaphore(self._max_concurrency) if self._max_concurrency else None
+
+    def set_max_concurrency(self, limit: Optional[int]) -> None:
+        """Cap concurrent OpenRouter streams at limit (None: no cap)."""
+        self._max_concurrency = limit
+        self._call_slots = self._new_call_slots()
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client, if one was created."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def prewarm(self) -> None:
+        """Establish the pooled TCP/TLS connection to openrouter.ai.
+
+        Any response (even an error status) leaves a keep-alive connection in the
+        pool, so the first consultation skips the handshake.
+        """
+        try:
+            await self._get_client().head(MODELS_URL, timeout=API_FETCH_TIMEOUT)
+        except Exception as e:
+            logger.debug("Connection prewarm failed: %s", e)
+
+    def _cached_catalog(self, key: str) -> Optional[dict[str, dict]]:
+        """Return the cached model index for key, or None if missing/expired."""
+        cached = self._catalog.get(key)
+        if cached and time.monotonic() - cached[0] < MODELS_CATALOG_TTL:
+            return cached[1]
+        return None
+
+    async def _get_models(self, api_key: str) -> Optional[dict[str, dict]]:
+        """Return the /models catalog, fetching it at most once per MODELS_CATALOG_TTL.
+
+        Returns:
+            Dict of model id -> model entry, or None if the API returned an error status
+        """
+        key = hashlib.sha256(api_key.encode()).hexdigest()
+        if (models := self._cached_catalog(key)) is not None:
+            return models
+
+        # Before taking the lock: _get_client rebuilds it when the event loop changed
+        client = self._get_client()
+        async with self._catalog_lock:
+            # Another caller may have refreshed it while we waited for the lock
+            if (models := self._cached_catalog(key)) is not None:
+                return models
+
+            headers = {
+                "Authorization": f"Bearer {api_key}",
+            }
+            response = await client.get(MODELS_URL, headers=headers, timeout=API_FETCH_TIMEOUT)
+
+            if response.status_code != 200:
+                logger.warning("Could not fetch model info: %s", response.status_code)
+                return None
+
+            # The catalog is a large JSON document; parse and index it off the event
+            # loop so concurrent consultations keep streaming meanwhile
+            models = await asyncio.to_thread(_index_models, response)
+            self._catalog[key] = (time.monotonic(), models)
+            return models
+
     async def get_model_info(self, model_name: str, api_key: Optional[str]) -> Optional[dict]:
-        """Get model information from OpenRouter API."""
+        """Get model information from OpenRouter API (catalog cached per API key)."""
         if not api_key:
             return None
 
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-        }
-
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(MODELS_URL, headers=headers, timeout=API_FETCH_TIMEOUT)
-
-                if response.status_code != 200:
-                    logger.warning(f"Could not fetch model info: {response.status_code}")
-                    return None
-
-                models = response.json().get("data", [])
-                for model_info in models:
-                    if model_info.get("id") == model_name:
-                        # Return in consistent format
-                        return {
-                            "context_length": model_info.get(
-                                "context_length", DEFAULT_CONTEXT_LENGTH
-                            ),
-                            "max_output_tokens": model_info.get(
-                                "max_completion_tokens", SMALL_OUTPUT_TOKENS
-                            ),
-                            "provider": "openrouter",
-                            "pricing": model_info.get("pricing"),
-                            "raw_info": model_info,  # Keep full info for debugging
-                        }
-
-                # Model not found in list
-                logger.warning(f"Model '{model_name}' not found in OpenRouter models list")
+            models = await self._get_models(api_key)
+            if models is None:
                 return None
 
+            model_info = models.get(model_name)
+            if model_info is not None:
+                # Return in consistent format
+                return {
+                    "context_length": model_info.get("context_length", DEFAULT_CONTEXT_LENGTH),
+                    "max_output_tokens": model_info.get(
+                        "max_completion_tokens", SMALL_OUTPUT_TOKENS
+                    ),
+                    "provider": "openrouter",
+                    "pricing": model_info.get("pricing"),
+                    "raw_info": model_info,  # Keep full info for debugging
+                }
+
+            # Model not found in list
+            logger.warning("Model '%s' not found in OpenRouter models list", model_name)
+            return None
+
         except Exception as e:
-            logger.warning(f"Error fetching model info: {e}")
+            logger.warning("Error fetching model info: %s", e)
             return None
 
     async def call_llm(
@@ -83,6 +243,8 @@ class OpenRouterProvider(BaseProvider):
         thinking_budget: Optional[int] = None,
         zdr: bool = False,
         mode: str = "fast",
+        model_info: Optional[dict] = None,
+        cache: bool = False,
     ) -> Tuple[str, Optional[str], Optional[int], Optional[float]]:
         """Call OpenRouter API with the content and query.
 
@@ -100,9 +262,11 @@ class OpenRouterProvider(BaseProvider):
                 None,
             )
 
-        # Get model context info
+        # Get model context info, unless the caller already has it (consultation
+        # passes its cached lookup, saving a second /models fetch per call)
         try:
-            model_info = await self.get_model_info(model_name, api_key)
+            if model_info is None:
+                model_info = await self.get_model_info(model_name, api_key)
             if not model_info:
                 model_info = {"context_length": DEFAULT_CONTEXT_LENGTH}
             context_length = model_info.get("context_length", DEFAULT_CONTEXT_LENGTH)
@@ -110,17 +274,12 @@ class OpenRouterProvider(BaseProvider):
             return "", str(e), None, None
 
         # Estimate tokens for the input
-        system_msg = (
-            "You are a helpful assistant analyzing code and files. Be specific and precise. "
-            "Match the length of your answer to the task — thorough when the question needs "
-            "depth or breadth, short when it doesn't. Lead with the key finding; don't pad."
-        )
         if content:
-            user_msg = f"Here are the files to analyze:\n\n{content}\n\nQuery: {query}"
+            estimated_tokens = estimate_tokens_parts(
+                SYSTEM_PROMPT, FILES_PREFIX, content, "\n\nQuery: ", query
+            )
         else:
-            user_msg = query
-        total_input = system_msg + user_msg
-        estimated_tokens = estimate_tokens(total_input)
+            estimated_tokens = estimate_tokens_parts(SYSTEM_PROMPT, query)
 
         # Base output token limit
         base_max_output_tokens = (
@@ -212,13 +371,28 @@ class OpenRouterProvider(BaseProvider):
 
         headers = {
             "Authorization": f"Bearer {api_key}",
-            "HTTP-Referer": "https://github.com/consult7",
-            "X-Title": "Consult7 MCP Server",
         }
 
+        # Prompt caching (opt-in): put the files in their own block with a cache
+        # breakpoint and the query after it, so the system prompt + files form a
+        # reusable prefix. Off by default since cache writes cost more than input.
+        if cache and content and model_name.startswith(PROMPT_CACHE_MODEL_PREFIXES):
+            user_content = [
+                {
+                    "type": "text",
+                    "text": FILES_PREFIX + content,
+                    "cache_control": {"type": "ephemeral"},
+                },
+                {"type": "text", "text": f"\n\nQuery: {query}"},
+            ]
+        elif content:
+            user_content = f"{FILES_PREFIX}{content}\n\nQuery: {query}"
+        else:
+            user_content = query
+
         messages = [
-            {"role": "system", "content": system_msg},
-            {"role": "user", "content": user_msg},
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_content},
         ]
 
         data = {
@@ -290,13 +464,19 @@ class OpenRouterProvider(BaseProvider):
         finish_reason = None
         cost = None  # USD cost, captured from the final usage chunk
         timed_out = False
+        slot_acquired = False
 
         try:
             # Stream to keep the connection alive during long reasoning (prevents
             # proxy/server truncation). asyncio.timeout caps total wall-clock so
             # that on timeout we keep whatever streamed (collected_content) instead
             # of discarding it; the httpx timeout guards a byte-silent connection.
-            async with asyncio.timeout(OPENROUTER_TIMEOUT), httpx.AsyncClient() as client:
+            # With --max-concurrency set, waiting for a slot counts against the same
+            # budget, so a queued call still finishes inside the LLM_CALL_TIMEOUT backstop.
+            client = self._get_client()
+            call_slot = self._call_slots or contextlib.nullcontext()
+            async with asyncio.timeout(OPENROUTER_TIMEOUT), call_slot:
+                slot_acquired = True
                 async with client.stream(
                     "POST",
                     OPENROUTER_URL,
@@ -336,61 +516,63 @@ class OpenRouterProvider(BaseProvider):
                         )
 
                     # Process SSE stream
-                    async for line in response.aiter_lines():
-                        if not line:
+                    async for data_str in _iter_sse_data(response):
+                        if data_str == b"[DONE]":
+                            break
+
+                        try:
+                            chunk = json_loads(data_str)
+
+                            # Capture cost from the usage chunk (sent near the
+                            # end of the stream, often with an empty choices list)
+                            usage = chunk.get("usage")
+                            if usage and usage.get("cost") is not None:
+                                cost = usage["cost"]
+                            if usage and (details := usage.get("prompt_tokens_details")):
+                                cached_tokens = details.get("cached_tokens", 0)
+                                prompt_tokens = usage.get("prompt_tokens") or 0
+                                logger.info(
+                                    "Prompt cache: %s of %s input tokens read from cache (%.0f%%)",
+                                    cached_tokens,
+                                    prompt_tokens,
+                                    100 * cached_tokens / prompt_tokens if prompt_tokens else 0,
+                                )
+
+                            # A mid-stream error arrives as a data chunk with a
+                            # top-level "error" key (after the initial 200). Surface
+                            # it instead of dropping it and later reporting a
+                            # misleading "No content received". Preserve any cost
+                            # already captured (fast-fail: return immediately).
+                            error_obj = chunk.get("error")
+                            if error_obj:
+                                err_msg = (
+                                    error_obj.get("message", str(error_obj))
+                                    if isinstance(error_obj, dict)
+                                    else str(error_obj)
+                                )
+                                return (
+                                    "",
+                                    f"API error (mid-stream): {err_msg}",
+                                    None,
+                                    cost,
+                                )
+
+                            # Extract content from delta
+                            if "choices" in chunk and chunk["choices"]:
+                                choice = chunk["choices"][0]
+                                delta = choice.get("delta", {})
+                                chunk_content = delta.get("content", "")
+                                if chunk_content:
+                                    collected_content.append(chunk_content)
+
+                                # Track finish_reason
+                                if choice.get("finish_reason"):
+                                    finish_reason = choice["finish_reason"]
+
+                        except (json.JSONDecodeError, UnicodeDecodeError):
+                            # Skip malformed chunks
                             continue
 
-                        # SSE format: "data: {...}" or "data: [DONE]"
-                        if line.startswith("data: "):
-                            data_str = line[6:]  # Remove "data: " prefix
-
-                            if data_str == "[DONE]":
-                                break
-
-                            try:
-                                chunk = json.loads(data_str)
-
-                                # Capture cost from the usage chunk (sent near the
-                                # end of the stream, often with an empty choices list)
-                                usage = chunk.get("usage")
-                                if usage and usage.get("cost") is not None:
-                                    cost = usage["cost"]
-
-                                # A mid-stream error arrives as a data chunk with a
-                                # top-level "error" key (after the initial 200). Surface
-                                # it instead of dropping it and later reporting a
-                                # misleading "No content received". Preserve any cost
-                                # already captured (fast-fail: return immediately).
-                                error_obj = chunk.get("error")
-                                if error_obj:
-                                    err_msg = (
-                                        error_obj.get("message", str(error_obj))
-                                        if isinstance(error_obj, dict)
-                                        else str(error_obj)
-                                    )
-                                    return (
-                                        "",
-                                        f"API error (mid-stream): {err_msg}",
-                                        None,
-                                        cost,
-                                    )
-
-                                # Extract content from delta
-                                if "choices" in chunk and chunk["choices"]:
-                                    choice = chunk["choices"][0]
-                                    delta = choice.get("delta", {})
-                                    chunk_content = delta.get("content", "")
-                                    if chunk_content:
-                                        collected_content.append(chunk_content)
-
-                                    # Track finish_reason
-                                    if choice.get("finish_reason"):
-                                        finish_reason = choice["finish_reason"]
-
-                            except json.JSONDecodeError:
-                                # Skip malformed chunks
-                                continue
-
         except (asyncio.TimeoutError, httpx.TimeoutException):
             # Total budget elapsed, or the connection stalled with no bytes. Keep
             # the partial buffer — fall through to the partial-return path below.
@@ -406,6 +588,18 @@ class OpenRouterProvider(BaseProvider):
         # normally None here because the usage chunk arrives at stream end.
         if timed_out:
             budget_mins = OPENROUTER_TIMEOUT / 60
+            if not slot_acquired:
+                return (
+                    "",
+                    (
+                        f"Server busy: no request slot freed up within {OPENROUTER_TIMEOUT:.0f} "
+                        f"seconds (~{budget_mins:.0f} minutes); {self._max_concurrency} "
+                        f"calls were already in flight (--max-concurrency). Retry later, "
+                        f"send fewer consultations at once, or raise the limit."
+                    ),
+                    None,
+                    None,
+                )
             if full_response:
                 marker = (
                     f"\n\n[TRUNCATED — output incomplete. Exceeded the "
@@ -433,6 +627,6 @@ class OpenRouterProvider(BaseProvider):
 
         # Log finish_reason for debugging truncation issues
         if finish_reason and finish_reason != "stop":
-            logger.warning(f"Response finish_reason: {finish_reason} (may indicate truncation)")
+            logger.warning("Response finish_reason: %s (may indicate truncation)", finish_reason)
 
         return (llm_response, None, budget_return, cost)
@@ -1,5 +1,6 @@
 """Consult7 MCP server - Analyze large file collections with AI models."""
 
+import asyncio
 import sys
 import logging
 from mcp.server import Server
@@ -9,10 +10,10 @@ from mcp.server.models import InitializationOptions
 from mcp.server.lowlevel import NotificationOptions
 
 # Import constants
-from .constants import SERVER_VERSION, EXIT_SUCCESS, EXIT_FAILURE, MIN_ARGS, TEST_MODELS
+from .constants import SERVER_VERSION, EXIT_SUCCESS, EXIT_FAILURE, MIN_ARGS, OPENROUTER_TEST_MODEL
 from .tool_definitions import ToolDescriptions
 from .providers import PROVIDERS
-from .consultation import consultation_impl
+from .consultation import consultation_impl, consultation_batch_impl, format_error_message
 
 # Set up consult7 logger
 logger = logging.getLogger("consult7")
@@ -41,8 +42,8 @@ async def test_api_connection(server: Consult7Server):
         print("Use --api-key flag")
         return False
 
-    # Use a default test model for each provider
-    test_model = TEST_MODELS.get(server.provider, TEST_MODELS["openrouter"])
+    # Use the default test model (provider is always openrouter)
+    test_model = OPENROUTER_TEST_MODEL
 
     # Simple test query
     test_content = "This is a test file with sample content."
@@ -72,6 +73,18 @@ async def main():
     # Simple argument parsing
     args = sys.argv[1:]
     test_mode = False
+    max_concurrency = None
+
+    # Optional cap on concurrent OpenRouter calls: --max-concurrency N
+    if "--max-concurrency" in args:
+        i = args.index("--max-concurrency")
+        value = args[i + 1] if i + 1 < len(args) else ""
+        if not value.isdigit() or int(value) < 1:
+            print("Error: --max-concurrency needs a positive integer")
+            print("Usage: consult7 <api-key> [--max-concurrency N] [--test]")
+            sys.exit(EXIT_FAILURE)
+        max_concurrency = int(value)
+        del args[i : i + 2]
 
     # Check for --test flag at the end
     if args and args[-1] == "--test":
@@ -81,18 +94,19 @@ async def main():
     # Validate arguments
     if len(args) < MIN_ARGS:
         print("Error: Missing required arguments")
-        print("Usage: consult7 <api-key> [--test]")
+        print("Usage: consult7 <api-key> [--max-concurrency N] [--test]")
         print()
         print("Note: Uses OpenRouter as the model provider")
         print()
         print("Examples:")
         print("  consult7 sk-or-v1-...")
         print("  consult7 sk-or-v1-... --test")
+        print("  consult7 sk-or-v1-... --max-concurrency 8")
         sys.exit(EXIT_FAILURE)
 
     if len(args) > MIN_ARGS:
         print(f"Error: Too many arguments. Expected {MIN_ARGS}, got {len(args)}")
-        print("Usage: consult7 <api-key> [--test]")
+        print("Usage: consult7 <api-key> [--max-concurrency N] [--test]")
         sys.exit(EXIT_FAILURE)
 
     # Parse api key - provider is always openrouter
@@ -101,52 +115,75 @@ async def main():
 
     # Create server with stored configuration
     server = Consult7Server("consult7", api_key, provider)
+    PROVIDERS[provider].set_max_concurrency(max_concurrency)
 
     @server.list_tools()
     async def list_tools() -> list[types.Tool]:
         """List available tools with provider-specific model examples."""
+        # One consultation's parameters; the batch tool takes a list of these
+        consultation_schema = {
+            "type": "object",
+            "properties": {
+                "files": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": ToolDescriptions.get_files_description(),
+                },
+                "query": {
+                    "type": "string",
+                    "description": ToolDescriptions.get_query_description(),
+                },
+                "model": {
+                    "type": "string",
+                    "description": (
+                        ToolDescriptions.get_model_parameter_description(server.provider)
+                    ),
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": ["fast", "mid", "think"],
+                    "description": (
+                        "Performance mode: 'fast' (no reasoning, fastest), "
+                        "'mid' (moderate reasoning), 'think' (maximum reasoning)"
+                    ),
+                },
+                "output_file": {
+                    "type": "string",
+                    "description": ToolDescriptions.get_output_file_description(),
+                },
+                "zdr": {
+                    "type": "boolean",
+                    "description": ToolDescriptions.get_zdr_description(),
+                },
+                "cache": {
+                    "type": "boolean",
+                    "description": ToolDescriptions.get_cache_description(),
+                },
+            },
+            "required": ["files", "query", "model", "mode"],
+        }
         return [
             types.Tool(
                 name="consultation",
                 description=ToolDescriptions.get_consultation_tool_description(server.provider),
+                inputSchema=consultation_schema,
+            ),
+            types.Tool(
+                name="consultation_batch",
+                description=ToolDescriptions.get_consultation_batch_tool_description(),
                 inputSchema={
                     "type": "object",
                     "properties": {
-                        "files": {
+                        "consultations": {
                             "type": "array",
-                            "items": {"type": "string"},
-                            "description": ToolDescriptions.get_files_description(),
-                        },
-                        "query": {
-                            "type": "string",
-                            "description": ToolDescriptions.get_query_description(),
-                        },
-                        "model": {
-                            "type": "string",
-                            "description": (
-                                ToolDescriptions.get_model_parameter_description(server.provider)
-                            ),
-                        },
-                        "mode": {
-                            "type": "string",
-                            "enum": ["fast", "mid", "think"],
-                            "description": (
-                                "Performance mode: 'fast' (no reasoning, fastest), "
-                                "'mid' (moderate reasoning), 'think' (maximum reasoning)"
-                            ),
-                        },
-                        "output_file": {
-                            "type": "string",
-                            "description": ToolDescriptions.get_output_file_description(),
-                        },
-                        "zdr": {
-                            "type": "boolean",
-                            "description": ToolDescriptions.get_zdr_description(),
+                            "items": consultation_schema,
+                            "minItems": 1,
+                            "description": ToolDescriptions.get_consultations_description(),
                         },
                     },
-                    "required": ["files", "query", "model", "mode"],
+                    "required": ["consultations"],
                 },
-            )
+            ),
         ]
 
     @server.call_tool()
@@ -163,69 +200,99 @@ async def main():
                     server.api_key,
                     arguments.get("output_file"),
                     arguments.get("zdr", False),
+                    arguments.get("cache", False),
                 )
                 return [types.TextContent(type="text", text=result)]
+            elif name == "consultation_batch":
+                consultations = arguments["consultations"]
+                results = await consultation_batch_impl(
+                    [
+                        {
+                            "files": item["files"],
+                            "query": item["query"],
+                            "model": item["model"],
+                            "mode": item["mode"],
+                            "provider": server.provider,
+                            "api_key": server.api_key,
+                            "output_file": item.get("output_file"),
+                            "zdr": item.get("zdr", False),
+                            "cache": item.get("cache", False),
+                        }
+                        for item in consultations
+                    ]
+                )
+                # One content block per consultation, in request order
+                return [
+                    types.TextContent(
+                        type="text",
+                        text=(
+                            f"Consultation {i} of {len(results)} "
+                            f"({item['model']}, {item['mode']}):\n\n{result}"
+                        ),
+                    )
+                    for i, (item, result) in enumerate(zip(consultations, results), start=1)
+                ]
             else:
                 return [types.TextContent(type="text", text=f"Error: Unknown tool '{name}'")]
         except Exception as e:
             # Log the full error for debugging
-            logger.error(f"Error in {name}: {type(e).__name__}: {str(e)}")
-
-            # Simple error message mapping
-            error_str = str(e).lower()
-            if any(x in error_str for x in ["connection", "network", "timeout", "unreachable"]):
-                error_msg = "Network error. Please check your internet connection."
-            elif any(x in error_str for x in ["unauthorized", "401", "403", "invalid api"]):
-                error_msg = "Invalid API key. Please check your credentials."
-            elif any(x in error_str for x in ["rate limit", "429", "quota"]):
-                error_msg = "Rate limit exceeded. Please wait and try again."
-            elif "not found" in error_str and "model" in error_str:
-                error_msg = "Model not found. Please check the model name."
-            elif any(x in error_str for x in ["too large", "exceeds", "context"]):
-                error_msg = "Content too large. Try using fewer files or a larger context model."
-            else:
-                # Return the original error if no mapping
-                error_msg = str(e)
+            logger.error("Error in %s: %s: %s", name, type(e).__name__, e)
 
-            return [types.TextContent(type="text", text=f"Error: {error_msg}")]
+            return [types.TextContent(type="text", text=f"Error: {format_error_message(e)}")]
 
     # Show model examples for the provider
     logger.info("Starting Consult7 MCP Server")
-    logger.info(f"Provider: {server.provider}")
+    logger.info("Provider: %s", server.provider)
     logger.info("API Key: Set")
 
     examples = ToolDescriptions.MODEL_EXAMPLES.get(server.provider, [])
     if examples:
-        logger.info(f"Example models for {server.provider}:")
+        logger.info("Example models for %s:", server.provider)
         for example in examples:
-            logger.info(f"  - {example}")
+            logger.info("  - %s", example)
 
     # Run test mode if requested
     if test_mode:
         success = await test_api_connection(server)
         sys.exit(EXIT_SUCCESS if success else EXIT_FAILURE)
 
-    # Normal server mode
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="consult7",
-                server_version=SERVER_VERSION,
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
+    # Normal server mode. Warm up the provider connection in the background while
+    # the MCP handshake runs, so the first consultation skips TCP/TLS setup
+    # (the reference keeps the task from being garbage-collected mid-flight).
+    provider_instance = PROVIDERS[server.provider]
+    _prewarm_task = asyncio.create_task(provider_instance.prewarm())
+
+    try:
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="consult7",
+                    server_version=SERVER_VERSION,
+                    capabilities=server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={},
+                    ),
                 ),
-            ),
-        )
+            )
+    finally:
+        # Close pooled keep-alive connections cleanly on shutdown
+        await provider_instance.aclose()
 
 
 def run():
     """Entry point for the consult7 command."""
-    import asyncio
+    # Use uvloop's faster event loop when it is installed (optional, not on Windows)
+    try:
+        import uvloop
+
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None
 
-    asyncio.run(main())
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())
 
 
 if __name__ == "__main__":
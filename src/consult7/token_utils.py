@@ -200,17 +200,32 @@ def estimate_tokens(text: str) -> int:
     Args:
         text: The text to estimate tokens for
 
+    Returns:
+        Estimated number of tokens (rounded up)
+    """
+    return estimate_tokens_parts(text)
+
+
+def estimate_tokens_parts(*parts: str) -> int:
+    """Estimate tokens in the concatenation of parts without building it.
+
+    Same result as estimate_tokens("".join(parts)), so a large file bundle can
+    be estimated alongside its prompt text without copying it.
+
+    Args:
+        *parts: The text pieces, in the order they would be joined
+
     Returns:
         Estimated number of tokens (rounded up)
     """
     # Check if text contains HTML/XML markers
-    is_html = "<" in text and ">" in text
+    is_html = any("<" in part for part in parts) and any(">" in part for part in parts)
 
     # Use appropriate character-to-token ratio
     chars_per_token = CHARS_PER_TOKEN_HTML if is_html else CHARS_PER_TOKEN_REGULAR
 
     # Estimate tokens and apply buffer
-    base_estimate = len(text) / chars_per_token
+    base_estimate = sum(map(len, parts)) / chars_per_token
     buffered_estimate = base_estimate * TOKEN_ESTIMATION_BUFFER
 
     return int(buffered_estimate + 0.5)  # Round to nearest integer
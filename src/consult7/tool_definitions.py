@@ -52,6 +52,25 @@ Files: Absolute paths, wildcards only in filenames (e.g., /path/*.py not /*/path
 Ignores: __pycache__, .env, secrets.py, .DS_Store, .git, node_modules
 Limits: Dynamic per model - each model optimized for its full context capacity"""
 
+    @classmethod
+    def get_consultation_batch_tool_description(cls) -> str:
+        """Get the description for the consultation_batch tool."""
+        return (
+            "Run several consultations concurrently in one call - e.g. the same question to "
+            "several models (ULTRA), or different questions over the same files. Each entry "
+            "takes the same parameters as the consultation tool. Results come back as one "
+            "block per consultation, in request order; a failed entry returns its error "
+            "without affecting the others. Total time is roughly that of the slowest entry."
+        )
+
+    @classmethod
+    def get_consultations_description(cls) -> str:
+        """Get the consultations parameter description for the batch tool."""
+        return (
+            "List of consultations, each with files, query, model, mode and optionally "
+            "output_file, zdr and cache (same meaning as in the consultation tool)"
+        )
+
     @classmethod
     def get_model_parameter_description(cls, provider: str) -> str:
         """Get the model parameter description with provider-specific examples."""
@@ -98,6 +117,16 @@ Limits: Dynamic per model - each model optimized for its full context capacity""
             "Not available: GPT-5.6 Sol, Grok 4.20, Claude Fable 5 (requires 30-day retention)"
         )
 
+    @classmethod
+    def get_cache_description(cls) -> str:
+        """Get the cache parameter description."""
+        return (
+            "Optional: Enable prompt caching of the files for Anthropic and Gemini models, "
+            "so follow-up calls over the same files within ~5 minutes read them from cache. "
+            "Default: false. Cache writes cost extra (Anthropic: 1.25x input price), so only "
+            "enable it for sequential follow-ups; parallel calls cannot reuse each other's cache"
+        )
+
     @classmethod
     def _get_provider_notes(cls, provider: str) -> str:
         """Get provider-specific notes."""